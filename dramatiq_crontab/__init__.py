@@ -8,7 +8,7 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from django.utils import timezone
 
-from . import _version
+from . import _version, tracing
 
 try:
     from sentry_sdk.crons import monitor
@@ -22,7 +22,7 @@ __all__ = ["cron", "interval", "scheduler"]
 
 
 class LazyBlockingScheduler(BlockingScheduler):
-    """Avoid annoying info logs for pending jobs."""
+    """Avoid annoying info logs for pending jobs and trace each scheduler tick."""
 
     def add_job(self, *args, **kwargs):
         logger = self._logger
@@ -32,6 +32,13 @@ class LazyBlockingScheduler(BlockingScheduler):
         super().add_job(*args, **kwargs)
         self._logger = logger
 
+    def _create_default_executor(self):
+        return tracing.ThreadPoolExecutor()
+
+    def _process_jobs(self):
+        with tracing.tick():
+            return super()._process_jobs()
+
 
 scheduler = LazyBlockingScheduler()
 
@@ -70,11 +77,12 @@ def cron(schedule):
             actor.fn = monitor(actor.actor_name)(actor.fn)
 
         scheduler.add_job(
-            actor.send,
+            tracing.send,
             CronTrigger.from_crontab(
                 schedule,
                 timezone=timezone.get_default_timezone(),
             ),
+            args=(actor,),
             name=actor.actor_name,
         )
         # We don't add the Sentry monitor on the actor itself, because we only want to
@@ -107,11 +115,12 @@ def interval(*, seconds):
             actor.fn = monitor(actor.actor_name)(actor.fn)
 
         scheduler.add_job(
-            actor.send,
+            tracing.send,
             IntervalTrigger(
                 seconds=seconds,
                 timezone=timezone.get_default_timezone(),
             ),
+            args=(actor,),
             name=actor.actor_name,
         )
         return actor
@@ -0,0 +1,214 @@
+"""Trace scheduled messages from their fire time to their worker execution."""
+
+import concurrent.futures
+import contextlib
+import contextvars
+import logging
+import os
+import socket
+import threading
+import uuid
+
+import dramatiq
+from apscheduler.executors import pool
+from dramatiq.common import current_millis
+
+try:
+    from opentelemetry import (
+        context as otel_context,
+        propagate,
+        trace,
+    )
+except ImportError:
+    tracer = None
+else:
+    tracer = trace.get_tracer(__name__)
+
+__all__ = ["SchedulerLatencyMiddleware", "ThreadPoolExecutor", "send", "tick"]
+
+logger = logging.getLogger(__name__)
+
+# The process holding the scheduler lock is the one dispatching messages.
+LEADER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_tick = contextvars.ContextVar("dramatiq_crontab_tick", default=None)
+_schedule = contextvars.ContextVar("dramatiq_crontab_schedule", default=(None, None))
+
+
+class _Tick:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.span = None
+
+    def start_span(self):
+        """Start the tick's span, once the first job is submitted."""
+        if tracer is not None and self.span is None:
+            self.span = tracer.start_span(
+                "dramatiq_crontab.tick",
+                attributes={
+                    "dramatiq_crontab.tick_id": self.id,
+                    "dramatiq_crontab.leader_id": LEADER_ID,
+                },
+            )
+        return self.span
+
+
+@contextlib.contextmanager
+def tick():
+    """
+    Mark a scheduler wake-up, all jobs submitted within share its tick id.
+
+    A span is only emitted for ticks that submit jobs. It covers the submission
+    in the scheduler thread, the messages are sent later from the executor's
+    threads, each within a child span of its own.
+    """
+    tick = _Tick()
+    token = _tick.set(tick)
+    try:
+        yield tick.id
+    finally:
+        _tick.reset(token)
+        if tick.span is not None:
+            tick.span.end()
+
+
+class _ContextThreadPool(concurrent.futures.ThreadPoolExecutor):
+    """Run callables in a copy of the context they have been submitted from."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class ThreadPoolExecutor(pool.ThreadPoolExecutor):
+    """Pass the tick and the scheduled fire time on to the jobs of a scheduler."""
+
+    def __init__(self, max_workers=10, pool_kwargs=None):
+        super().__init__(max_workers, pool_kwargs)
+        self._pool = _ContextThreadPool(int(max_workers), **(pool_kwargs or {}))
+
+    def _do_submit_job(self, job, run_times):
+        # We rely on APScheduler's default coalesce=True, which merges missed runs
+        # into the latest one. Without it, every run would share the latest time.
+        scheduled_at = int(run_times[-1].timestamp() * 1000)
+        token = _schedule.set((scheduled_at, current_millis()))
+        tick = _tick.get()
+        span = tick.start_span() if tick is not None else None
+        otel_token = None
+        if span is not None:
+            # Sends run in a copy of this context and become children of the tick.
+            otel_token = otel_context.attach(trace.set_span_in_context(span))
+        try:
+            super()._do_submit_job(job, run_times)
+        finally:
+            if otel_token is not None:
+                otel_context.detach(otel_token)
+            _schedule.reset(token)
+
+
+def send(actor):
+    """Send a message to the actor, stamped with the tick that scheduled it."""
+    scheduled_at, dispatched_at = _schedule.get()
+    tick = _tick.get()
+    options = {
+        "crontab_scheduled_at": scheduled_at,
+        "crontab_dispatched_at": dispatched_at,
+        "crontab_tick_id": tick.id if tick is not None else None,
+        "crontab_leader_id": LEADER_ID,
+    }
+    options = {key: value for key, value in options.items() if value is not None}
+    if tracer is None:
+        return actor.send_with_options(**options)
+
+    with tracer.start_as_current_span(
+        f"dramatiq_crontab.send {actor.actor_name}",
+        kind=trace.SpanKind.PRODUCER,
+        attributes={
+            "messaging.system": "dramatiq",
+            "messaging.destination.name": actor.queue_name,
+            **{
+                f"dramatiq_crontab.{key.removeprefix('crontab_')}": value
+                for key, value in options.items()
+            },
+        },
+    ) as span:
+        carrier = {}
+        propagate.inject(carrier)
+        if carrier:
+            options["crontab_trace_context"] = carrier
+        message = actor.send_with_options(**options)
+        span.set_attribute("messaging.message.id", message.message_id)
+        return message
+
+
+class SchedulerLatencyMiddleware(dramatiq.Middleware):
+    """
+    Record how long scheduled messages waited before a worker started them.
+
+    Usage:
+        dramatiq.get_broker().add_middleware(SchedulerLatencyMiddleware())
+
+    The schedule-to-start latency is logged for the first attempt of every
+    scheduled message, retries are delayed by their backoff. If OpenTelemetry is
+    installed, every attempt is also traced as a child span of the scheduler's
+    send span.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def before_process_message(self, broker, message):
+        scheduled_at = message.options.get("crontab_scheduled_at")
+        if scheduled_at is None:
+            return
+        started_at = current_millis()
+        retries = message.options.get("retries", 0)
+        if not retries:
+            logger.info(
+                "%s started %dms after it was scheduled.",
+                message.actor_name,
+                started_at - scheduled_at,
+            )
+        if tracer is None:
+            return
+
+        enqueued_at = message.options.get(
+            "requeue_timestamp", message.message_timestamp
+        )
+        attributes = {
+            "messaging.system": "dramatiq",
+            "messaging.message.id": message.message_id,
+            "dramatiq_crontab.retries": retries,
+            "dramatiq_crontab.enqueue_to_start": started_at - enqueued_at,
+        }
+        for key in ["tick_id", "leader_id", "scheduled_at", "dispatched_at"]:
+            if (value := message.options.get(f"crontab_{key}")) is not None:
+                attributes[f"dramatiq_crontab.{key}"] = value
+        if not retries:
+            attributes["dramatiq_crontab.schedule_to_start"] = started_at - scheduled_at
+            dispatched_at = message.options.get("crontab_dispatched_at")
+            if dispatched_at is not None:
+                attributes["dramatiq_crontab.dispatch_to_start"] = (
+                    started_at - dispatched_at
+                )
+
+        span = tracer.start_span(
+            f"dramatiq_crontab.process {message.actor_name}",
+            context=propagate.extract(message.options.get("crontab_trace_context", {})),
+            kind=trace.SpanKind.CONSUMER,
+            attributes=attributes,
+        )
+        token = otel_context.attach(trace.set_span_in_context(span))
+        self._local.span = span, token
+
+    def after_process_message(self, broker, message, *, result=None, exception=None):
+        span, token = getattr(self._local, "span", (None, None))
+        if span is None:
+            return
+        del self._local.span
+        otel_context.detach(token)
+        if exception is not None:
+            span.record_exception(exception)
+            span.set_status(trace.StatusCode.ERROR, str(exception))
+        span.end()
+
+    after_skip_message = after_process_message
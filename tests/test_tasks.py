@@ -1,8 +1,11 @@
 import datetime
+import threading
 
+import dramatiq
 import pytest
+from django.utils import timezone
 from django.utils.timezone import make_aware
-from dramatiq_crontab import interval, scheduler, tasks
+from dramatiq_crontab import LazyBlockingScheduler, interval, scheduler, tasks, tracing
 
 
 def test_heartbeat(caplog):
@@ -14,6 +17,9 @@ def test_heartbeat(caplog):
 def test_cron__stars():
     assert not scheduler.remove_all_jobs()
     assert tasks.cron("* * * * *")(tasks.heartbeat)
+    job = scheduler.get_jobs()[0]
+    assert job.func is tracing.send
+    assert job.args == (tasks.heartbeat,)
     init = make_aware(datetime.datetime(2021, 1, 1, 0, 0, 0))
     assert scheduler.get_jobs()[0].trigger.get_next_fire_time(init, init) == make_aware(
         datetime.datetime(2021, 1, 1, 0, 1)
@@ -79,7 +85,36 @@ def test_cron__error(schedule):
 def test_interval__seconds():
     assert not scheduler.remove_all_jobs()
     assert interval(seconds=30)(tasks.heartbeat)
+    job = scheduler.get_jobs()[0]
+    assert job.func is tracing.send
+    assert job.args == (tasks.heartbeat,)
     init = make_aware(datetime.datetime(2021, 1, 1, 0, 0, 0))
     assert scheduler.get_jobs()[0].trigger.get_next_fire_time(init, init) == make_aware(
         datetime.datetime(2021, 1, 1, 0, 0, 30)
     )
+
+
+def test_scheduler__tracing(monkeypatch):
+    local_scheduler = LazyBlockingScheduler()
+    monkeypatch.setattr("dramatiq_crontab.scheduler", local_scheduler)
+    broker = dramatiq.get_broker()
+    broker.flush_all()
+    interval(seconds=3600)(tasks.heartbeat)
+    thread = threading.Thread(target=local_scheduler.start)
+    thread.start()
+    try:
+        run_time = timezone.now()
+        local_scheduler.get_jobs()[0].modify(next_run_time=run_time)
+        message = dramatiq.Message.decode(
+            broker.queues[tasks.heartbeat.queue_name].get(timeout=5)
+        )
+    finally:
+        local_scheduler.shutdown()
+        thread.join()
+    assert isinstance(
+        local_scheduler._lookup_executor("default"), tracing.ThreadPoolExecutor
+    )
+    assert message.actor_name == "heartbeat"
+    assert message.options["crontab_scheduled_at"] == int(run_time.timestamp() * 1000)
+    assert message.options["crontab_tick_id"]
+    assert message.options["crontab_leader_id"] == tracing.LEADER_ID
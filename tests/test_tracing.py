@@ -0,0 +1,189 @@
+import datetime
+import threading
+from unittest.mock import Mock
+
+import dramatiq
+import pytest
+from dramatiq.common import current_millis
+from dramatiq_crontab import tracing
+
+
+@pytest.fixture()
+def spans(monkeypatch):
+    """Record spans in memory, without touching the global tracer provider."""
+    pytest.importorskip("opentelemetry.sdk", reason="opentelemetry is not installed")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer(tracing.__name__))
+    yield exporter.get_finished_spans
+    provider.shutdown()
+
+
+@pytest.fixture()
+def executor():
+    executor = tracing.ThreadPoolExecutor()
+    executor.start(Mock(_create_lock=threading.RLock), "default")
+    yield executor
+    executor.shutdown()
+
+
+def submit(executor, actor, run_time):
+    done = threading.Event()
+
+    def func(actor):
+        try:
+            tracing.send(actor)
+        finally:
+            done.set()
+
+    job = Mock(
+        id=actor.actor_name,
+        func=func,
+        args=(actor,),
+        kwargs={},
+        max_instances=1,
+        misfire_grace_time=None,
+    )
+    executor.submit_job(job, [run_time])
+    assert done.wait(timeout=5)
+
+
+def test_thread_pool_executor():
+    executor = tracing.ThreadPoolExecutor(
+        max_workers=2, pool_kwargs={"thread_name_prefix": "crontab"}
+    )
+    assert isinstance(executor._pool, tracing._ContextThreadPool)
+    assert executor._pool._max_workers == 2
+    assert executor._pool._thread_name_prefix == "crontab"
+
+
+def test_send(monkeypatch):
+    monkeypatch.setattr(tracing, "tracer", None)
+    actor = Mock(actor_name="heartbeat")
+    tracing.send(actor)
+    options = actor.send_with_options.call_args.kwargs
+    assert options["crontab_leader_id"] == tracing.LEADER_ID
+    assert "crontab_scheduled_at" not in options
+    assert "crontab_tick_id" not in options
+
+
+def test_send__tick(executor):
+    actor = Mock(actor_name="heartbeat")
+    run_time = datetime.datetime.now(datetime.timezone.utc)
+    with tracing.tick() as tick_id:
+        submit(executor, actor, run_time)
+    options = actor.send_with_options.call_args.kwargs
+    assert options["crontab_scheduled_at"] == int(run_time.timestamp() * 1000)
+    assert (
+        0 <= options["crontab_dispatched_at"] - options["crontab_scheduled_at"] < 1000
+    )
+    assert options["crontab_tick_id"] == tick_id
+    assert options["crontab_leader_id"] == tracing.LEADER_ID
+
+
+def test_send__spans(executor, spans):
+    actor = Mock(actor_name="heartbeat", queue_name="default")
+    actor.send_with_options.return_value = Mock(message_id="1234")
+    run_time = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+    with tracing.tick() as tick_id:
+        submit(executor, actor, run_time)
+    tick_span, send_span = sorted(spans(), key=lambda span: span.name, reverse=True)
+    assert tick_span.name == "dramatiq_crontab.tick"
+    assert tick_span.attributes["dramatiq_crontab.tick_id"] == tick_id
+    assert send_span.name == "dramatiq_crontab.send heartbeat"
+    assert send_span.parent.span_id == tick_span.context.span_id
+    assert send_span.attributes["messaging.message.id"] == "1234"
+    assert send_span.attributes["dramatiq_crontab.scheduled_at"] == 1609459200000
+    options = actor.send_with_options.call_args.kwargs
+    assert "traceparent" in options["crontab_trace_context"]
+
+
+def test_tick__no_jobs(spans):
+    with tracing.tick():
+        pass
+    assert not spans()
+
+
+class TestSchedulerLatencyMiddleware:
+    def message(self, **options):
+        return dramatiq.Message(
+            queue_name="default",
+            actor_name="heartbeat",
+            args=(),
+            kwargs={},
+            options=options,
+        )
+
+    def test_before_process_message(self, caplog):
+        middleware = tracing.SchedulerLatencyMiddleware()
+        message = self.message(crontab_scheduled_at=1609459200000)
+        with caplog.at_level("INFO"):
+            middleware.before_process_message(None, message)
+            middleware.after_process_message(None, message)
+        assert "heartbeat started" in caplog.text
+        assert "ms after it was scheduled." in caplog.text
+
+    def test_before_process_message__retry(self, caplog):
+        middleware = tracing.SchedulerLatencyMiddleware()
+        message = self.message(
+            crontab_scheduled_at=1609459200000,
+            retries=1,
+            requeue_timestamp=1609459260000,
+        )
+        with caplog.at_level("INFO"):
+            middleware.before_process_message(None, message)
+            middleware.after_process_message(None, message)
+        assert not caplog.text
+
+    def test_before_process_message__not_scheduled(self, caplog):
+        middleware = tracing.SchedulerLatencyMiddleware()
+        message = self.message()
+        with caplog.at_level("INFO"):
+            middleware.before_process_message(None, message)
+            middleware.after_process_message(None, message)
+        assert not caplog.text
+
+    def test_process_span(self, executor, spans):
+        middleware = tracing.SchedulerLatencyMiddleware()
+        actor = Mock(actor_name="heartbeat", queue_name="default")
+        with tracing.tick():
+            submit(executor, actor, datetime.datetime.now(datetime.timezone.utc))
+        message = self.message(**actor.send_with_options.call_args.kwargs)
+        middleware.before_process_message(None, message)
+        middleware.after_process_message(None, message, exception=ValueError("boom"))
+
+        spans_by_name = {span.name: span for span in spans()}
+        send_span = spans_by_name["dramatiq_crontab.send heartbeat"]
+        process_span = spans_by_name["dramatiq_crontab.process heartbeat"]
+        assert process_span.parent.span_id == send_span.context.span_id
+        assert process_span.context.trace_id == send_span.context.trace_id
+        assert process_span.attributes["dramatiq_crontab.tick_id"]
+        assert process_span.attributes["dramatiq_crontab.schedule_to_start"] >= 0
+        assert not process_span.status.is_ok
+
+    def test_process_span__retry(self, spans):
+        middleware = tracing.SchedulerLatencyMiddleware()
+        requeued_at = current_millis() - 500
+        message = self.message(
+            crontab_scheduled_at=1609459200000,
+            crontab_dispatched_at=1609459200001,
+            retries=1,
+            requeue_timestamp=requeued_at,
+        )
+        middleware.before_process_message(None, message)
+        middleware.after_process_message(None, message)
+
+        (process_span,) = spans()
+        assert process_span.attributes["dramatiq_crontab.retries"] == 1
+        assert (
+            500 <= process_span.attributes["dramatiq_crontab.enqueue_to_start"] < 1500
+        )
+        assert "dramatiq_crontab.schedule_to_start" not in process_span.attributes
+        assert "dramatiq_crontab.dispatch_to_start" not in process_span.attributes